@@ -0,0 +1,152 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "web_mcp_rag"))
+
+from embedding_batcher import EmbeddingBatcher  # noqa: E402
+
+
+class RecordingEmbeddings:
+    """Fake embedding model that records every batch and echoes each text back as its vector."""
+
+    def __init__(self, delay: float = 0.0, error: BaseException = None, drop_last: bool = False):
+        self.batches = []
+        self.delay = delay
+        self.error = error
+        self.drop_last = drop_last
+
+    async def aembed_documents(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        vectors = [[text] for text in texts]
+        return vectors[:-1] if self.drop_last else vectors
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=5))
+
+
+def test_vectors_are_routed_to_their_callers_across_batches():
+    async def main():
+        model = RecordingEmbeddings()
+        batcher = EmbeddingBatcher(model, max_batch_size=4, max_wait=0.01)
+        requests = [[f"r{i}-{j}" for j in range(n)] for i, n in enumerate([3, 10, 1])]
+        results = await asyncio.gather(*(batcher.embed_documents(texts) for texts in requests))
+        return model, requests, results
+
+    model, requests, results = run(main())
+    for texts, vectors in zip(requests, results):
+        assert vectors == [[text] for text in texts]
+    assert all(len(batch) <= 4 for batch in model.batches)
+    assert len(model.batches) == 4  # 14 texts in batches of at most 4
+    assert sorted(sum(model.batches, [])) == sorted(sum(requests, []))
+
+
+def test_queries_are_taken_before_documents():
+    async def main():
+        model = RecordingEmbeddings()
+        batcher = EmbeddingBatcher(model, max_batch_size=3, max_wait=0.01)
+        await asyncio.gather(batcher.embed_documents(["d0", "d1", "d2", "d3"]),
+                             batcher.embed_query("q0"), batcher.embed_query("q1"))
+        return model
+
+    model = run(main())
+    assert model.batches[0] == ["q0", "q1", "d0"]
+
+
+def test_texts_arriving_within_max_wait_share_a_batch():
+    async def main():
+        model = RecordingEmbeddings()
+        batcher = EmbeddingBatcher(model, max_batch_size=64, max_wait=0.2)
+
+        async def late(texts, delay):
+            await asyncio.sleep(delay)
+            return await batcher.embed_documents(texts)
+
+        await asyncio.gather(batcher.embed_documents(["a"]), late(["b"], 0.02))
+        await asyncio.gather(batcher.embed_documents(["c"]), late(["d"], 0.5))
+        return model
+
+    model = run(main())
+    assert model.batches == [["a", "b"], ["c"], ["d"]]
+
+
+def test_full_batch_is_sent_without_waiting_for_max_wait():
+    async def main():
+        batcher = EmbeddingBatcher(RecordingEmbeddings(), max_batch_size=2, max_wait=60)
+        return await asyncio.wait_for(batcher.embed_documents(["a", "b"]), timeout=1)
+
+    assert run(main()) == [["a"], ["b"]]
+
+
+def test_query_is_not_blocked_by_in_flight_document_batch():
+    async def main():
+        model = RecordingEmbeddings(delay=0.5)
+        batcher = EmbeddingBatcher(model, max_batch_size=2, max_wait=0)
+        documents = asyncio.ensure_future(batcher.embed_documents(["d0", "d1", "d2", "d3"]))
+        await asyncio.sleep(0.05)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await batcher.embed_query("q")
+        query_latency = loop.time() - start
+        await documents
+        return model, query_latency
+
+    model, query_latency = run(main())
+    assert query_latency < 0.9  # one model call, not two
+    assert model.batches == [["d0", "d1"], ["q"], ["d2", "d3"]]
+
+
+def test_cancelled_caller_is_skipped():
+    async def main():
+        model = RecordingEmbeddings()
+        batcher = EmbeddingBatcher(model, max_batch_size=64, max_wait=0.1)
+        cancelled = asyncio.ensure_future(batcher.embed_documents(["gone"]))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        result = await batcher.embed_documents(["kept"])
+        return model, result
+
+    model, result = run(main())
+    assert result == [["kept"]]
+    assert model.batches == [["kept"]]
+
+
+@pytest.mark.parametrize("model, error", [
+    (RecordingEmbeddings(error=ConnectionError("ollama down")), ConnectionError),
+    (RecordingEmbeddings(drop_last=True), RuntimeError),
+])
+def test_batch_failure_reaches_every_caller(model, error):
+    async def main():
+        batcher = EmbeddingBatcher(model, max_batch_size=64, max_wait=0.01)
+        results = await asyncio.gather(batcher.embed_documents(["a", "b"]), batcher.embed_query("q"),
+                                       return_exceptions=True)
+        model.error, model.drop_last = None, False
+        return results, await batcher.embed_query("after")
+
+    results, after = run(main())
+    assert all(isinstance(result, error) for result in results)
+    assert after == ["after"]  # The worker survives a failed batch
+
+
+def test_aclose_releases_queued_and_in_flight_callers():
+    async def main():
+        model = RecordingEmbeddings(delay=60)
+        batcher = EmbeddingBatcher(model, max_batch_size=1, max_wait=0)
+        callers = asyncio.gather(batcher.embed_documents(["a", "b"]), batcher.embed_query("q"),
+                                 return_exceptions=True)
+        await asyncio.sleep(0.05)
+        await batcher.aclose()
+        results = await asyncio.wait_for(callers, timeout=1)
+        model.delay = 0
+        return model, results, await batcher.embed_query("after")
+
+    model, results, after = run(main())
+    assert model.batches[:2] == [["q"], ["a"]]  # "b" was still queued, not sent
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert after == ["after"]  # A new call starts a new worker
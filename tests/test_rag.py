@@ -0,0 +1,105 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "web_mcp_rag"))
+
+import rag  # noqa: E402
+
+
+class UnusedEmbeddings(Embeddings):
+    """Vectors are always passed in precomputed, so the model must never be called."""
+
+    def embed_documents(self, texts):
+        raise AssertionError("embed_documents should not be called")
+
+    def embed_query(self, text):
+        raise AssertionError("embed_query should not be called")
+
+
+def make_corpus(n, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    # Rows with very different norms, so cosine and L2 rankings disagree
+    vectors = rng.standard_normal((n, dim)) * rng.uniform(0.1, 10, (n, 1))
+    documents = [Document(page_content=str(i), metadata={"source": f"https://example.com/{i}"}) for i in range(n)]
+    return documents, vectors.tolist(), (rng.standard_normal(dim) * 7).tolist()
+
+
+def contents(documents):
+    return [doc.page_content for doc in documents]
+
+
+def test_numpy_and_faiss_branches_rank_the_same():
+    documents, vectors, query = make_corpus(40)
+    numpy_store = rag.build_vectorstore(documents, UnusedEmbeddings(), vectors, max_numpy_docs=40)
+    faiss_store = rag.build_vectorstore(documents, UnusedEmbeddings(), vectors, max_numpy_docs=39)
+    assert isinstance(numpy_store, rag.NumpyVectorStore)
+    assert isinstance(faiss_store, FAISS)
+    for k in (1, 3, 10):
+        assert contents(numpy_store.similarity_search_by_vector(query, k=k)) == \
+            contents(faiss_store.similarity_search_by_vector(query, k=k))
+
+
+def reference_top_k(vectors, query, k):
+    matrix = np.asarray(vectors)
+    scores = matrix @ np.asarray(query) / np.linalg.norm(matrix, axis=1)
+    return [str(i) for i in np.argsort(-scores, kind="stable")[:k]]
+
+
+def test_top_k_matches_full_argsort():
+    documents, vectors, query = make_corpus(200)
+    store = rag.NumpyVectorStore(UnusedEmbeddings(), documents, vectors)
+    for k in (1, 3, 17, 199):
+        assert contents(store.similarity_search_by_vector(query, k=k)) == reference_top_k(vectors, query, k)
+
+
+def test_k_at_least_n_returns_every_document_sorted():
+    documents, vectors, query = make_corpus(5)
+    store = rag.NumpyVectorStore(UnusedEmbeddings(), documents, vectors)
+    expected = reference_top_k(vectors, query, 5)
+    assert contents(store.similarity_search_by_vector(query, k=5)) == expected
+    assert contents(store.similarity_search_by_vector(query, k=50)) == expected
+
+
+def test_non_positive_k_returns_nothing():
+    documents, vectors, query = make_corpus(5)
+    store = rag.NumpyVectorStore(UnusedEmbeddings(), documents, vectors)
+    assert store.similarity_search_by_vector(query, k=0) == []
+    assert store.similarity_search_by_vector(query, k=-1) == []
+
+
+def test_zero_norm_query_and_rows():
+    documents = [Document(page_content=str(i)) for i in range(3)]
+    store = rag.NumpyVectorStore(UnusedEmbeddings(), documents, [[0.0, 0.0], [1.0, 0.0], [0.0, 2.0]])
+    # A zero row scores 0 instead of producing NaN
+    assert contents(store.similarity_search_by_vector([3.0, 1.0], k=3)) == ["1", "2", "0"]
+    # A zero query scores every row 0; ties keep corpus order
+    assert contents(store.similarity_search_by_vector([0.0, 0.0], k=2)) == ["0", "1"]
+
+
+def test_empty_corpus():
+    store = rag.NumpyVectorStore(UnusedEmbeddings(), [], [])
+    assert len(store) == 0
+    assert store.similarity_search_by_vector([1.0, 0.0], k=3) == []
+
+
+def test_vector_count_mismatch_raises():
+    documents, vectors, _ = make_corpus(3)
+    with pytest.raises(ValueError):
+        rag.NumpyVectorStore(UnusedEmbeddings(), documents, vectors[:2])
+    with pytest.raises(ValueError):
+        rag.NumpyVectorStore(UnusedEmbeddings(), [], vectors)
+
+
+def test_build_vectorstore_switches_above_limit():
+    documents, vectors, _ = make_corpus(11)
+    at_limit = rag.build_vectorstore(documents[:10], UnusedEmbeddings(), vectors[:10], max_numpy_docs=10)
+    over_limit = rag.build_vectorstore(documents, UnusedEmbeddings(), vectors, max_numpy_docs=10)
+    assert isinstance(at_limit, rag.NumpyVectorStore)
+    assert isinstance(over_limit, FAISS)
+    assert over_limit.index.ntotal == 11
@@ -0,0 +1,74 @@
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+import rag
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """Stand-in model: vectors are computed up front so the benchmark times only the vector stores."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError("Vectors are passed to build_vectorstore precomputed.")
+
+    def embed_query(self, text: str) -> List[float]:
+        raise NotImplementedError("Queries are searched by vector.")
+
+
+def make_documents(n: int) -> List[Document]:
+    return [Document(page_content=f"Synthetic snippet number {i} about topic {i % 17}.",
+                     metadata={"source": f"https://example.com/{i}"}) for i in range(n)]
+
+
+def time_store(name: str, max_numpy_docs: int, documents: List[Document], embeddings: Embeddings,
+               vectors: List[List[float]], query_vector: List[float], repeats: int) -> None:
+    # Same calls create_rag / search_rag make once the embeddings are back from the batcher
+    start = time.perf_counter()
+    for _ in range(repeats):
+        store = rag.build_vectorstore(documents, embeddings, vectors, max_numpy_docs=max_numpy_docs)
+    build_ms = (time.perf_counter() - start) * 1000 / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        store.similarity_search_by_vector(query_vector, k=3)
+    search_ms = (time.perf_counter() - start) * 1000 / repeats
+
+    print(f"{name:<6} n={len(documents):<6} build: {build_ms:8.3f} ms   search: {search_ms:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare build_vectorstore's NumPy and FAISS branches.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200, 1000, 5000])
+    parser.add_argument("--dim", type=int, default=768, help="Embedding size (nomic-embed-text is 768)")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--ollama", action="store_true",
+                        help="Embed with Ollama (nomic-embed-text) instead of random vectors")
+    args = parser.parse_args()
+
+    query = "investment advice for common people"
+    for n in args.sizes:
+        documents = make_documents(n)
+        if args.ollama:
+            from langchain_ollama import OllamaEmbeddings
+            embeddings = OllamaEmbeddings(model=rag.EMBEDDING_MODEL)
+            vectors = embeddings.embed_documents([doc.page_content for doc in documents])
+            query_vector = embeddings.embed_query(query)
+        else:
+            embeddings = PrecomputedEmbeddings()
+            rng = np.random.default_rng(n)
+            vectors = rng.standard_normal((n, args.dim), dtype=np.float32).tolist()
+            query_vector = rng.standard_normal(args.dim, dtype=np.float32).tolist()
+
+        time_store("numpy", n, documents, embeddings, vectors, query_vector, args.repeats)
+        time_store("faiss", n - 1, documents, embeddings, vectors, query_vector, args.repeats)
+        chosen = "numpy" if n <= rag.NUMPY_STORE_MAX_DOCS else "faiss"
+        print(f"       create_rag would use: {chosen} (NUMPY_STORE_MAX_DOCS={rag.NUMPY_STORE_MAX_DOCS})\n")
+
+
+if __name__ == "__main__":
+    main()
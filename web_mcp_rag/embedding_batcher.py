@@ -0,0 +1,180 @@
+import asyncio
+import os
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+# Batching limits; tune with env vars to match the Ollama host
+EMBED_MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", "64"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "10"))
+
+_Pending = Tuple[str, asyncio.Future]
+
+
+class EmbeddingBatcher:
+    """
+    Collect embedding requests from concurrent callers into micro-batches.
+
+    Texts are queued with a future each; a single worker task waits up to
+    max_wait seconds (or until max_batch_size texts are queued), sends the batch
+    to the embedding model once, and resolves every future with its own vector.
+    Query texts are always taken before document texts, and at most one batch
+    containing documents is in flight at a time while query-only batches are sent
+    immediately, so a search never waits behind bulk indexing on this side
+    (Ollama may still serialize requests unless OLLAMA_NUM_PARALLEL > 1).
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = EMBED_MAX_BATCH_SIZE,
+                 max_wait: float = EMBED_MAX_WAIT_MS / 1000):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.loop = asyncio.get_running_loop()
+        self._queries: Deque[_Pending] = deque()
+        self._documents: Deque[_Pending] = deque()
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._document_batch: Optional[asyncio.Task] = None
+
+    async def embed_query(self, text: str) -> List[float]:
+        return (await self._submit([text], self._queries))[0]
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._submit(texts, self._documents)
+
+    async def aclose(self) -> None:
+        """Stop the worker; callers with texts still queued or in flight get CancelledError."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def _submit(self, texts: List[str], queue: Deque[_Pending]) -> List[List[float]]:
+        if not texts:
+            return []
+        futures = [self.loop.create_future() for _ in texts]
+        queue.extend(zip(texts, futures))
+        if self._worker is None or self._worker.done():
+            self._worker = self.loop.create_task(self._run())
+        self._wakeup.set()
+        return list(await asyncio.gather(*futures))
+
+    def _ready_queues(self) -> Tuple[Deque[_Pending], ...]:
+        # Documents wait while a document batch is in flight; queries never do
+        if self._document_batch is None:
+            return (self._queries, self._documents)
+        return (self._queries,)
+
+    def _ready(self) -> int:
+        return sum(len(queue) for queue in self._ready_queues())
+
+    def _take_batch(self) -> Tuple[List[_Pending], bool]:
+        batch: List[_Pending] = []
+        has_documents = False
+        for queue in self._ready_queues():
+            while queue and len(batch) < self.max_batch_size:
+                text, future = queue.popleft()
+                if not future.done():  # Skip callers that were cancelled
+                    batch.append((text, future))
+                    has_documents = has_documents or queue is self._documents
+        return batch, has_documents
+
+    def _dispatch(self, batch: List[_Pending], has_documents: bool) -> None:
+        task = self.loop.create_task(self._send(batch))
+        self._in_flight.add(task)
+        if has_documents:
+            self._document_batch = task
+        task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        if task is self._document_batch:
+            self._document_batch = None
+            self._wakeup.set()  # Queued documents may go now
+
+    async def _run(self) -> None:
+        try:
+            await self._loop_batches()
+        finally:
+            # The worker only stops when cancelled; release everyone still waiting
+            for task in list(self._in_flight):
+                task.cancel()
+            for queue in (self._queries, self._documents):
+                while queue:
+                    queue.popleft()[1].cancel()
+
+    async def _loop_batches(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._ready():
+                continue
+
+            # Give other in-flight requests a moment to join the batch
+            deadline = self.loop.time() + self.max_wait
+            while self._ready() < self.max_batch_size:
+                remaining = deadline - self.loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._wakeup.clear()
+
+            batch, has_documents = self._take_batch()
+            if batch:
+                self._dispatch(batch, has_documents)
+            if self._ready():
+                self._wakeup.set()
+
+    async def _send(self, batch: List[_Pending]) -> None:
+        try:
+            vectors = await self.embeddings.aembed_documents([text for text, _ in batch])
+            if len(vectors) != len(batch):
+                raise RuntimeError(f"Embedding model returned {len(vectors)} vectors for {len(batch)} texts.")
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+        except BaseException as e:
+            if isinstance(e, Exception):  # Cancellation is a normal shutdown, not an error
+                print(f"Error in embedding batch of {len(batch)} texts: {e!r}")
+            # Never leave a caller waiting, including when this task is cancelled
+            for _, future in batch:
+                if not future.done():
+                    if isinstance(e, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+
+
+_batchers: Dict[int, EmbeddingBatcher] = {}
+
+
+def get_embedding_batcher(embeddings: Embeddings) -> EmbeddingBatcher:
+    """
+    Return the shared batcher for an embedding model on the running event loop.
+
+    Batchers are keyed by the embeddings instance, so callers must pass one that
+    is usable from the current loop (rag.get_embeddings makes one per loop).
+    Batchers whose loop has closed are dropped.
+
+    Args:
+        embeddings: Embedding model shared by all callers.
+
+    Returns:
+        EmbeddingBatcher: Batcher bound to the current event loop.
+    """
+    for key in [key for key, batcher in _batchers.items() if batcher.loop.is_closed()]:
+        del _batchers[key]
+    batcher = _batchers.get(id(embeddings))
+    if batcher is None or batcher.loop is not asyncio.get_running_loop():
+        batcher = EmbeddingBatcher(embeddings)
+        _batchers[id(embeddings)] = batcher
+    return batcher
@@ -1,15 +1,137 @@
 from langchain_ollama import OllamaEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 # import search # No longer needed for get_web_content
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+import numpy as np
 import os
 import asyncio
-from typing import List, Dict, Any # Added typing
+import weakref
+from typing import List, Dict, Any, Optional, Union # Added typing
+import embedding_batcher
+
+EMBEDDING_MODEL = "nomic-embed-text:latest"
+
+_embeddings_by_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OllamaEmbeddings]" = weakref.WeakKeyDictionary()
+
+
+def get_embeddings() -> OllamaEmbeddings:
+    """
+    Return the embedding model shared by every request on the running event loop.
+
+    Sharing one instance lets all requests feed the same embedding batcher. A new
+    instance is made per loop because OllamaEmbeddings' async HTTP client is bound
+    to the loop it first ran on (e.g. agent.py calls asyncio.run once per query).
+    """
+    loop = asyncio.get_running_loop()
+    embeddings = _embeddings_by_loop.get(loop)
+    if embeddings is None:
+        embeddings = OllamaEmbeddings(model=EMBEDDING_MODEL)
+        _embeddings_by_loop[loop] = embeddings
+    return embeddings
+
+# Corpora up to this many chunks use NumpyVectorStore instead of FAISS.
+# benchmark.py (768-dim, 1 CPU) finds no crossover: both are flat brute-force
+# searches, NumPy builds faster at every size tried (10 chunks: 0.4 vs 1.1 ms,
+# 500: 12 vs 18 ms, 5000: 166 vs 228 ms) and search times are on par. 512 is
+# an arbitrary cap, well above the few dozen chunks a Tavily search yields.
+NUMPY_STORE_MAX_DOCS = int(os.getenv("NUMPY_STORE_MAX_DOCS", "512"))
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NumpyVectorStore:
+    """
+    Minimal in-memory vector store for small corpora.
+
+    Keeps all embeddings in one contiguous, L2-normalized float32 matrix and ranks
+    documents by dot product (cosine similarity). Exposes the same search methods
+    that search_rag uses on FAISS, without the docstore / id-mapping overhead.
+    """
+
+    def __init__(self, embedding: Embeddings, documents: List[Document], vectors: Any):
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        if matrix.size == 0 and not documents:
+            matrix = matrix.reshape(0, 0)  # Empty corpus: every search returns []
+        if matrix.ndim != 2 or matrix.shape[0] != len(documents):
+            raise ValueError("Expected one embedding vector per document.")
+        self.embedding = embedding
+        self._documents = list(documents)
+        self._matrix = _normalize_rows(matrix)
+
+    @classmethod
+    def from_documents(cls, documents: List[Document], embedding: Embeddings) -> "NumpyVectorStore":
+        vectors = embedding.embed_documents([doc.page_content for doc in documents])
+        return cls(embedding, documents, vectors)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        # Same accessor name as LangChain vector stores such as FAISS
+        return self.embedding
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> List[Document]:
+        n = len(self._documents)
+        k = min(k, n)
+        if k <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        scores = self._matrix @ query
+        # argpartition is O(n); only the k winners need a full sort
+        top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [self._documents[i] for i in top]
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k=k)
+
+
+VectorStore = Union[NumpyVectorStore, FAISS]
+
+
+def build_vectorstore(documents: List[Document], embeddings: Embeddings,
+                      vectors: Optional[List[List[float]]] = None,
+                      max_numpy_docs: Optional[int] = None) -> VectorStore:
+    """
+    Build the cheapest vector store for the corpus size.
+
+    Args:
+        documents: Already chunked documents to index.
+        embeddings: Embedding model used for documents and queries.
+        vectors: Precomputed document embeddings; computed with `embeddings` if omitted.
+        max_numpy_docs: Largest corpus served by NumpyVectorStore
+                        (defaults to NUMPY_STORE_MAX_DOCS); larger corpora use FAISS.
+
+    Returns:
+        VectorStore: NumpyVectorStore or FAISS vector store object.
+    """
+    limit = NUMPY_STORE_MAX_DOCS if max_numpy_docs is None else max_numpy_docs
+    texts = [doc.page_content for doc in documents]
+    if vectors is None:
+        vectors = embeddings.embed_documents(texts)
+    if len(documents) <= limit:
+        return NumpyVectorStore(embeddings, documents, vectors)
+    # Inner product over unit rows ranks by cosine similarity, like NumpyVectorStore
+    # (the query norm does not change the order, so it needs no normalizing)
+    unit_vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+    return FAISS.from_embeddings(text_embeddings=list(zip(texts, unit_vectors)), embedding=embeddings,
+                                 metadatas=[doc.metadata for doc in documents],
+                                 distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT)
 
 
 # Updated function signature and logic
-async def create_rag(search_results: List[Dict[str, Any]]) -> FAISS:
+async def create_rag(search_results: List[Dict[str, Any]]) -> Optional[VectorStore]:
     """
     Create a RAG vector store from Tavily search results.
 
@@ -18,7 +140,7 @@ async def create_rag(search_results: List[Dict[str, Any]]) -> FAISS:
                         from Tavily, expected to have 'content' and 'url'.
 
     Returns:
-        FAISS: Vector store object.
+        VectorStore: NumpyVectorStore for small corpora, FAISS otherwise.
     """
     try:
         # model_name = os.getenv("MODEL", "text-embedding-ada-002")
@@ -27,7 +149,7 @@ async def create_rag(search_results: List[Dict[str, Any]]) -> FAISS:
         #     model="mistral-embed",
         #     chunk_size=64
         # )
-        embeddings = OllamaEmbeddings(model="nomic-embed-text:latest")
+        embeddings = get_embeddings()
         # embeddings = OpenAIEmbeddings(
         #     model=model_name,
         #     openai_api_key=os.getenv("OPENAI_API_KEY"),
@@ -72,16 +194,18 @@ async def create_rag(search_results: List[Dict[str, Any]]) -> FAISS:
         split_documents = text_splitter.split_documents(documents)
         # print(documents)
 
-        # Ensure embeddings are calculated before creating the index
-        # (FAISS.from_documents handles this internally)
-        vectorstore = FAISS.from_documents(documents=split_documents, embedding=embeddings)
+        # Embed through the shared batcher so concurrent requests share Ollama calls
+        vectors = await embedding_batcher.get_embedding_batcher(embeddings).embed_documents(
+            [doc.page_content for doc in split_documents])
+        # Small corpora (the usual case for Tavily snippets) skip FAISS entirely
+        vectorstore = build_vectorstore(split_documents, embeddings, vectors)
         return vectorstore
     except Exception as e:
         print(f"Error in create_rag: {str(e)}")
         # Optionally re-raise or handle the error appropriately
         raise # Re-raise the exception to signal failure
 
-async def create_rag_from_documents(documents: list[Document]) -> FAISS:
+async def create_rag_from_documents(documents: list[Document]) -> VectorStore:
     """
     Create a RAG system directly from a list of documents to avoid repeated web scraping
     
@@ -89,7 +213,7 @@ async def create_rag_from_documents(documents: list[Document]) -> FAISS:
         documents: List of already fetched documents
         
     Returns:
-        FAISS: Vector store object
+        VectorStore: NumpyVectorStore for small corpora, FAISS otherwise
     """
     try:
         # model_name = os.getenv("MODEL")
@@ -99,7 +223,7 @@ async def create_rag_from_documents(documents: list[Document]) -> FAISS:
         #     openai_api_base=os.getenv("OPENAI_API_BASE"),
         #     chunk_size=64
         # )
-        embeddings = OllamaEmbeddings(model="nomic-embed-text:latest") # Ensure consistency
+        embeddings = get_embeddings() # Ensure consistency
 
         # Text chunking processing
         text_splitter = RecursiveCharacterTextSplitter(
@@ -112,21 +236,27 @@ async def create_rag_from_documents(documents: list[Document]) -> FAISS:
         )
         split_documents = text_splitter.split_documents(documents)
 
-        vectorstore = FAISS.from_documents(documents=split_documents, embedding=embeddings)
+        vectors = await embedding_batcher.get_embedding_batcher(embeddings).embed_documents(
+            [doc.page_content for doc in split_documents])
+        vectorstore = build_vectorstore(split_documents, embeddings, vectors)
         return vectorstore
     except Exception as e:
         print(f"Error in create_rag_from_documents: {str(e)}")
         raise
 
-async def search_rag(query: str, vectorstore: FAISS) -> list[Document]:
+async def search_rag(query: str, vectorstore: VectorStore) -> list[Document]:
     """
     Search the RAG system with a query
     
     Args:
         query: Search query string
-        vectorstore: FAISS vector store to search against
+        vectorstore: NumpyVectorStore or FAISS vector store to search against
         
     Returns:
         list[Document]: List of relevant documents
     """
-    return vectorstore.similarity_search(query, k=3)
\ No newline at end of file
+    # Embed with the model the store was built with; queries jump ahead of
+    # queued document batches to keep search latency low
+    embeddings = vectorstore.embeddings or get_embeddings()
+    vector = await embedding_batcher.get_embedding_batcher(embeddings).embed_query(query)
+    return vectorstore.similarity_search_by_vector(vector, k=3)
\ No newline at end of file